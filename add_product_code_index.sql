@@ -0,0 +1,10 @@
+-- Indexes for product code lookup
+-- UPPER(malzeme_kodu) = UPPER(%s) predicate'i düz B-tree index kullanamıyordu;
+-- functional index ile kod araması full scan yerine index seek olur.
+-- INCLUDE kolonları sayesinde find_by_code sorgusu heap'e inmeden
+-- index-only scan ile cevaplanır.
+CREATE INDEX IF NOT EXISTS idx_products_malzeme_kodu_upper
+    ON products (upper(malzeme_kodu)) INCLUDE (id, malzeme_adi);
+
+CREATE INDEX IF NOT EXISTS idx_inventory_product_id_stock
+    ON inventory (product_id) INCLUDE (current_stock);
@@ -0,0 +1,15 @@
+-- Trigram search support for keyword product lookup
+-- Türkçe karakter varyantları (ı/i, ş/s, ğ/g...) için Python tarafında
+-- pattern permütasyonu üretmek yerine normalize kolon + GIN trgm index
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Normalized product name: diacritics stripped, lowercased
+ALTER TABLE products
+    ADD COLUMN IF NOT EXISTS malzeme_adi_norm TEXT
+    GENERATED ALWAYS AS (
+        lower(translate(malzeme_adi, 'ÇĞİÖŞÜçğıöşü', 'CGIOSUcgiosu'))
+    ) STORED;
+
+-- GIN trigram index for fuzzy/substring search
+CREATE INDEX IF NOT EXISTS idx_products_malzeme_adi_norm_trgm
+    ON products USING gin (malzeme_adi_norm gin_trgm_ops);
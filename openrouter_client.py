@@ -5,18 +5,215 @@ Natural language processing for spec extraction and intent classification
 """
 
 import os
+import re
 import json
-import requests
+import time
+import sqlite3
+import asyncio
+import httpx
 import logging
+import threading
+from collections import deque
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
+from aiolimiter import AsyncLimiter
 from dotenv import load_dotenv
 
+# Embedding tabanlı fuzzy cache için opsiyonel bağımlılıklar
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
+# Fallback sayı çıkarımı - çağrı başına pattern cache probe yerine tek compile
+_DIGITS_RE = re.compile(r'\d+')
+
 logger = logging.getLogger(__name__)
 
+def _normalize_prompt(text: str) -> str:
+    """Normalize prompt text for cache keys"""
+    return ' '.join(text.strip().lower().split())
+
+# Token bucket - çağrı aralarına sabit sleep serpiştirmek yerine gerçek
+# istek hızını sınırlar; API izin verdiği sürece bekletmez (60 istek/dk)
+_RATE_LIMIT = AsyncLimiter(max_rate=60, time_period=60)
+
+class _SyncRateLimiter:
+    """Sync yol için token bucket - monotonic timestamp kuyruğu üzerinden"""
+
+    def __init__(self, max_rate: int = 60, time_period: float = 60.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._stamps = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._stamps and now - self._stamps[0] >= self.time_period:
+                    self._stamps.popleft()
+                if len(self._stamps) < self.max_rate:
+                    self._stamps.append(now)
+                    return
+                wait = self.time_period - (now - self._stamps[0])
+            time.sleep(wait)
+
+_SYNC_RATE_LIMIT = _SyncRateLimiter()
+
+class SemanticCache:
+    """Two-tier cache for LLM calls: exact-match dict + embedding-based fuzzy match.
+
+    Tier 1: normalized-prompt dict (in memory, exact hits).
+    Tier 2: MiniLM embedding cosine similarity >= threshold, persisted to SQLite
+    so warm runs skip the HTTP round trip entirely (GPTCache-style).
+    """
+
+    EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+    def __init__(self, db_path: str = "cache.db", ttl: int = 24 * 3600, threshold: float = 0.95):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.threshold = threshold
+        self.stats = {'exact_hits': 0, 'fuzzy_hits': 0, 'misses': 0}
+        self._exact: Dict[str, tuple] = {}  # key -> (response, created)
+        self._model = None
+        # Per-kind embedding matrix + parallel response/timestamp lists for
+        # vectorized lookup
+        self._embeddings: Dict[str, Any] = {}
+        self._responses: Dict[str, List[str]] = {}
+        self._created: Dict[str, List[float]] = {}
+        # Flask worker'ları / to_thread aynı singleton'a yazar - hem SQLite
+        # bağlantısı hem in-memory tier'lar tek lock ile korunur
+        self._lock = threading.Lock()
+
+        try:
+            # check_same_thread=False: bağlantı import eden thread'de açılır
+            # ama put() üretimde worker thread'lerden gelir
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS semantic_cache (
+                    kind TEXT, prompt TEXT, embedding BLOB, response TEXT, created REAL
+                )
+            """)
+            self._db.execute("DELETE FROM semantic_cache WHERE created < ?", (time.time() - ttl,))
+            self._db.commit()
+            self._load_persisted()
+        except Exception as e:
+            logger.warning(f"Semantic cache disabled (SQLite error): {e}")
+            self._db = None
+
+    def _load_persisted(self):
+        """Warm the in-memory tiers from SQLite"""
+        for kind, prompt, emb_blob, response, created in self._db.execute(
+                "SELECT kind, prompt, embedding, response, created FROM semantic_cache"):
+            self._exact[f"{kind}:{prompt}"] = (response, created)
+            if EMBEDDINGS_AVAILABLE and emb_blob:
+                emb = np.frombuffer(emb_blob, dtype=np.float32)
+                self._append_embedding(kind, emb, response, created)
+
+    def _append_embedding(self, kind: str, emb, response: str, created: float):
+        if kind in self._embeddings:
+            self._embeddings[kind] = np.vstack([self._embeddings[kind], emb])
+        else:
+            self._embeddings[kind] = emb.reshape(1, -1)
+        self._responses.setdefault(kind, []).append(response)
+        self._created.setdefault(kind, []).append(created)
+
+    def _embed(self, text: str):
+        if self._model is None:
+            # Double-checked: model yüklemesi ağır, lock sadece ilk sefer alınır
+            with self._lock:
+                if self._model is None:
+                    self._model = SentenceTransformer(self.EMBEDDING_MODEL)
+        emb = self._model.encode([text])[0].astype(np.float32)
+        norm = np.linalg.norm(emb)
+        return emb / norm if norm else emb
+
+    def get(self, kind: str, prompt: str) -> Optional[str]:
+        """Cache lookup: exact match first, then embedding cosine match.
+
+        TTL burada da uygulanır: startup DELETE'i uzun ömürlü Flask/bridge
+        süreçlerinde yetmez, in-memory girdiler de yaşlanınca elenir."""
+        norm_prompt = _normalize_prompt(prompt)
+        cutoff = time.time() - self.ttl
+
+        # Tier 1: exact match
+        key = f"{kind}:{norm_prompt}"
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is not None and entry[1] < cutoff:
+                # Süresi dolmuş - evict, miss say
+                del self._exact[key]
+                entry = None
+        if entry is not None:
+            self.stats['exact_hits'] += 1
+            return entry[0]
+
+        # Tier 2: embedding fuzzy match
+        if EMBEDDINGS_AVAILABLE and kind in self._embeddings:
+            try:
+                q = self._embed(norm_prompt)  # encode lock dışında - yavaş
+                with self._lock:
+                    # Matris + cevap/zaman listeleri tutarlı okunur
+                    emb_matrix = self._embeddings.get(kind)
+                    responses = self._responses.get(kind)
+                    created = self._created.get(kind)
+                if emb_matrix is not None:
+                    scores = emb_matrix @ q  # rows already L2-normalized
+                    # Süresi dolan satırlar argmax'a girmesin
+                    fresh = np.array(created) >= cutoff
+                    if fresh.any():
+                        scores = np.where(fresh, scores, -1.0)
+                        best = int(scores.argmax())
+                        if scores[best] >= self.threshold:
+                            self.stats['fuzzy_hits'] += 1
+                            return responses[best]
+            except Exception as e:
+                logger.warning(f"Fuzzy cache lookup failed: {e}")
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, kind: str, prompt: str, response: str):
+        """Store a response in both tiers and persist to SQLite"""
+        norm_prompt = _normalize_prompt(prompt)
+
+        emb = None
+        emb_blob = None
+        if EMBEDDINGS_AVAILABLE:
+            try:
+                emb = self._embed(norm_prompt)  # encode lock dışında - yavaş
+                emb_blob = emb.tobytes()
+            except Exception as e:
+                logger.warning(f"Embedding for cache failed: {e}")
+
+        now = time.time()
+        with self._lock:
+            self._exact[f"{kind}:{norm_prompt}"] = (response, now)
+            if emb is not None:
+                self._append_embedding(kind, emb, response, now)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT INTO semantic_cache (kind, prompt, embedding, response, created) VALUES (?, ?, ?, ?, ?)",
+                        (kind, norm_prompt, emb_blob, response, now)
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.warning(f"Semantic cache persist failed: {e}")
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats['exact_hits'] + self.stats['fuzzy_hits'] + self.stats['misses']
+        return (self.stats['exact_hits'] + self.stats['fuzzy_hits']) / total if total else 0.0
+
 @dataclass
 class AIResponse:
     """AI response with structured data"""
@@ -36,62 +233,159 @@ class OpenRouterClient:
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.model = os.getenv("MODEL", "openai/gpt-3.5-turbo")
         self.base_url = "https://openrouter.ai/api/v1"
-        
+        self._aclient = None  # Lazy httpx.AsyncClient for concurrent callers
+        self._client = None   # Lazy httpx.Client - bağlantı çağrılar arası yaşar
+        self.cache = SemanticCache()
+
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY not found in environment variables")
-    
-    def _make_request(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
-        """Make API request to OpenRouter"""
-        headers = {
+
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        return self.cache.stats
+
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": "https://github.com/Bahadir67/intelligent-rag-chat-system",
             "X-Title": "B2B RAG Sales Assistant"
         }
-        
-        payload = {
+
+    def _payload(self, messages: List[Dict[str, str]], temperature: float) -> Dict[str, Any]:
+        return {
             "model": self.model,
             "messages": messages,
             "temperature": temperature,
             "max_tokens": 1000
         }
-        
+
+    @staticmethod
+    def _fix_encoding(content: Any) -> str:
+        """Ensure proper UTF-8 encoding of response content"""
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        elif isinstance(content, str):
+            # Fix any encoding issues in string
+            try:
+                content = content.encode('latin1').decode('utf-8')
+            except (UnicodeEncodeError, UnicodeDecodeError):
+                # If encoding fix fails, keep original
+                pass
+        return content
+
+    @staticmethod
+    def _log_cache_usage(result: Dict):
+        """Log provider-side prompt cache hits to confirm prefix caching works"""
+        usage = result.get("usage") or {}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") \
+            or usage.get("prompt_tokens_cached")
+        if cached:
+            logger.debug(f"Prompt prefix cache hit: {cached} cached prompt tokens")
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Lazy shared AsyncClient so concurrent requests reuse one connection"""
+        if self._aclient is None or self._aclient.is_closed:
+            self._aclient = httpx.AsyncClient(http2=True, timeout=30)
+        return self._aclient
+
+    def _get_sync_client(self) -> httpx.Client:
+        """Lazy shared sync client - TLS handshake bir kez ödenir, HTTP/2
+        multiplex eşzamanlı çağrılarda aynı bağlantıyı paylaşır"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(http2=True, timeout=30)
+        return self._client
+
+    async def _amake_request(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
+        """Async API request to OpenRouter (for concurrent callers)"""
         try:
-            response = requests.post(
+            async with _RATE_LIMIT:
+                response = await self._get_async_client().post(
+                    f"{self.base_url}/chat/completions",
+                    headers=self._headers(),
+                    json=self._payload(messages, temperature)
+                )
+            response.raise_for_status()
+
+            result = response.json()
+            self._log_cache_usage(result)
+            return self._fix_encoding(result["choices"][0]["message"]["content"])
+
+        except httpx.HTTPError as e:
+            logger.error(f"OpenRouter API request failed: {e}")
+            raise
+        except KeyError as e:
+            logger.error(f"Unexpected API response format: {e}")
+            raise
+
+    def _make_request(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
+        """Make API request to OpenRouter"""
+        headers = self._headers()
+        payload = self._payload(messages, temperature)
+
+        try:
+            _SYNC_RATE_LIMIT.acquire()
+            response = self._get_sync_client().post(
                 f"{self.base_url}/chat/completions",
                 headers=headers,
-                json=payload,
-                timeout=30
+                json=payload
             )
             response.raise_for_status()
-            
+
             result = response.json()
-            content = result["choices"][0]["message"]["content"]
-            
-            # Ensure proper UTF-8 encoding
-            if isinstance(content, bytes):
-                content = content.decode('utf-8')
-            elif isinstance(content, str):
-                # Fix any encoding issues in string
-                try:
-                    content = content.encode('latin1').decode('utf-8')
-                except (UnicodeEncodeError, UnicodeDecodeError):
-                    # If encoding fix fails, keep original
-                    pass
-            
-            return content
-            
-        except requests.exceptions.RequestException as e:
+            self._log_cache_usage(result)
+            return self._fix_encoding(result["choices"][0]["message"]["content"])
+
+        except httpx.HTTPError as e:
             logger.error(f"OpenRouter API request failed: {e}")
             raise
         except KeyError as e:
             logger.error(f"Unexpected API response format: {e}")
             raise
     
-    def extract_specifications(self, user_message: str, context: Dict = None, conversation_history: List[str] = None, previous_ai_response: str = None) -> AIResponse:
-        """Extract product specifications from natural language"""
-        
-        system_prompt = """Sen bir B2B pnömatik ürün satış asistanısın. Kullanıcının mesajını analiz ederek hangi tür ürün aradığını ve ne yapılması gerektiğini belirle.
+    def _stream_request(self, messages: List[Dict[str, str]], temperature: float = 0.7):
+        """SSE streaming request - delta chunk'ları üretildikçe yield edilir.
+
+        Algılanan gecikme tam üretim süresi yerine ilk token süresine iner.
+        """
+        payload = self._payload(messages, temperature)
+        payload["stream"] = True
+
+        _SYNC_RATE_LIMIT.acquire()
+        with self._get_sync_client().stream(
+            "POST",
+            f"{self.base_url}/chat/completions",
+            headers=self._headers(),
+            json=payload
+        ) as response:
+            response.raise_for_status()
+
+            for line in response.iter_lines():
+                if not line or not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+                try:
+                    delta = json.loads(data)["choices"][0]["delta"].get("content")
+                except (json.JSONDecodeError, KeyError, IndexError):
+                    continue  # SSE comment / keep-alive satırları
+                if delta:
+                    yield self._fix_encoding(delta)
+
+    def stream_generate_response(self, user_message: str, context: Dict, products: List[Dict] = None):
+        """Streaming variant of generate_response - yields str chunks"""
+        messages = self._build_response_messages(user_message, context, products)
+
+        try:
+            yield from self._stream_request(messages, temperature=0.7)
+        except Exception as e:
+            logger.error(f"Streaming response failed: {e}")
+            yield "Üzgünüm, şu anda teknik bir sorun yaşıyoruz. Lütfen daha sonra tekrar deneyin."
+
+    # Sabit spec-extraction sistem prompt'u. Byte-identical kalmalı ki provider
+    # prefix cache'i isabet etsin - per-call veriler user turn'lerine eklenir.
+    SPEC_SYSTEM_PROMPT = """Sen bir B2B pnömatik ürün satış asistanısın. Kullanıcının mesajını analiz ederek hangi tür ürün aradığını ve ne yapılması gerektiğini belirle.
 
 ANA ÜRÜN TİPLERİ:
 1. ANA VALF (main_valve): 5/2, 3/2, 4/2, 5/3 vb. - Bağlantı boyutu parametresi gerekli
@@ -201,10 +495,38 @@ DOGRU ORNEKLER:
 - "100 çap silindir" → diameter: 100, intent: "incomplete_spec", clarification_questions: ["Strok uzunluğu?"]
 - "şartlandırıcılara nerler var" → corrected_query: "şartlandırıcılara neler var", intent: "product_search" (şartlandırıcı ürün listesi)"""
 
+    # Explicit cache_control marker'ı destekleyen vendor önekleri. Diğerleri
+    # (OpenAI vb.) byte-identical öneki otomatik cache'ler - marker göndermek
+    # yerine düz string content daha güvenli.
+    PROMPT_CACHE_VENDORS = ("anthropic/", "google/")
+
+    def supports_prompt_cache(self) -> bool:
+        """Aktif model explicit prompt-cache marker'ı destekliyor mu"""
+        return self.model.startswith(self.PROMPT_CACHE_VENDORS)
+
+    def _cached_system_message(self, prompt: str) -> Dict[str, Any]:
+        """System message tagged for provider prompt-prefix caching.
+
+        OpenRouter forwards cache_control markers to providers that support
+        them; for the rest the prompt is sent as a plain string and relies on
+        the vendor's automatic byte-identical prefix caching.
+        """
+        if not self.supports_prompt_cache():
+            return {"role": "system", "content": prompt}
+        return {
+            "role": "system",
+            "content": [
+                {"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}
+            ]
+        }
+
+    def _build_spec_messages(self, user_message: str, context: Dict = None, conversation_history: List[str] = None, previous_ai_response: str = None) -> List[Dict[str, str]]:
+        """Build message list for spec extraction (shared by sync/async paths)"""
+
         messages = [
-            {"role": "system", "content": system_prompt}
+            self._cached_system_message(self.SPEC_SYSTEM_PROMPT)
         ]
-        
+
         # Add conversation history if available
         if conversation_history:
             for i, prev_msg in enumerate(conversation_history[-3:]):  # Last 3 messages
@@ -221,52 +543,110 @@ DOGRU ORNEKLER:
             
         # Add current user message
         messages.append({"role": "user", "content": f"Yeni mesaj: {user_message}"})
-        
+
+        return messages
+
+    def _spec_from_data(self, ai_data: Dict) -> AIResponse:
+        """Build an AIResponse from a parsed spec-extraction JSON object"""
+        # Ensure all new fields are handled
+        extracted_specs = ai_data.get("extracted_specs", {})
+        if "product_code" not in extracted_specs:
+            extracted_specs["product_code"] = None
+        if "connection_size" not in extracted_specs:
+            extracted_specs["connection_size"] = None
+        if "special_properties" not in extracted_specs:
+            extracted_specs["special_properties"] = []
+        if "corrected_query" not in extracted_specs:
+            extracted_specs["corrected_query"] = None
+
+        return AIResponse(
+            intent=ai_data.get("intent", "general_question"),
+            confidence=ai_data.get("confidence", 0.5),
+            extracted_specs=extracted_specs,
+            suggested_response=ai_data.get("suggested_response", ""),
+            requires_clarification=ai_data.get("requires_clarification", False),
+            clarification_questions=ai_data.get("clarification_questions", []),
+            sub_intent=ai_data.get("sub_intent", "unknown"),
+            action=ai_data.get("action", "clarify_intent")
+        )
+
+    def _fallback_spec_response(self) -> AIResponse:
+        """Fallback AIResponse when the model output can't be parsed"""
+        return AIResponse(
+            intent="general_question",
+            confidence=0.3,
+            extracted_specs={},
+            suggested_response="Üzgünüm, isteğinizi tam olarak anlayamadım. Lütfen daha detaylı açıklayabilir misiniz?",
+            requires_clarification=True,
+            clarification_questions=["Hangi ürün hakkında bilgi istiyorsunuz?"],
+            sub_intent="unknown",
+            action="clarify_intent"
+        )
+
+    def _parse_spec_response(self, response: str) -> AIResponse:
+        """Parse the spec-extraction JSON response into an AIResponse"""
         try:
-            response = self._make_request(messages, temperature=0.2)
-            
-            # Parse JSON response
-            ai_data = json.loads(response)
-            
-            # Ensure all new fields are handled
-            extracted_specs = ai_data.get("extracted_specs", {})
-            if "product_code" not in extracted_specs:
-                extracted_specs["product_code"] = None
-            if "connection_size" not in extracted_specs:
-                extracted_specs["connection_size"] = None  
-            if "special_properties" not in extracted_specs:
-                extracted_specs["special_properties"] = []
-            if "corrected_query" not in extracted_specs:
-                extracted_specs["corrected_query"] = None
-            
-            return AIResponse(
-                intent=ai_data.get("intent", "general_question"),
-                confidence=ai_data.get("confidence", 0.5),
-                extracted_specs=extracted_specs,
-                suggested_response=ai_data.get("suggested_response", ""),
-                requires_clarification=ai_data.get("requires_clarification", False),
-                clarification_questions=ai_data.get("clarification_questions", []),
-                sub_intent=ai_data.get("sub_intent", "unknown"),
-                action=ai_data.get("action", "clarify_intent")
-            )
-            
+            return self._spec_from_data(json.loads(response))
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse AI response as JSON: {e}")
-            # Fallback response
-            return AIResponse(
-                intent="general_question",
-                confidence=0.3,
-                extracted_specs={},
-                suggested_response="Üzgünüm, isteğinizi tam olarak anlayamadım. Lütfen daha detaylı açıklayabilir misiniz?",
-                requires_clarification=True,
-                clarification_questions=["Hangi ürün hakkında bilgi istiyorsunuz?"],
-                sub_intent="unknown",
-                action="clarify_intent"
-            )
-    
-    def classify_intent(self, user_message: str, conversation_history: List[str] = None) -> str:
-        """Classify user intent for conversation flow"""
-        
+            return self._fallback_spec_response()
+
+    @staticmethod
+    def _spec_cache_prompt(user_message: str, context: Dict = None, conversation_history: List[str] = None, previous_ai_response: str = None) -> str:
+        """Cache anahtarı: mesaj + konuşma durumu parmak izi.
+
+        Context/history cevabı değiştirdiği için anahtara girer - aynı stage ve
+        spec'lerle tekrarlanan mesajlar ("evet", "200 strok") LLM'e gitmeden
+        cache'ten döner, stage değişince anahtar da değişir."""
+        if context is None and conversation_history is None and previous_ai_response is None:
+            return user_message
+        fingerprint = json.dumps({
+            'ctx': context,
+            'hist': conversation_history,
+            'prev': previous_ai_response
+        }, ensure_ascii=False, sort_keys=True, default=str)
+        return f"{user_message}\n{fingerprint}"
+
+    def extract_specifications(self, user_message: str, context: Dict = None, conversation_history: List[str] = None, previous_ai_response: str = None) -> AIResponse:
+        """Extract product specifications from natural language"""
+        cache_prompt = self._spec_cache_prompt(user_message, context, conversation_history, previous_ai_response)
+        cached = self.cache.get('spec', cache_prompt)
+        if cached is not None:
+            return self._parse_spec_response(cached)
+
+        messages = self._build_spec_messages(user_message, context, conversation_history, previous_ai_response)
+        response = self._make_request(messages, temperature=0.2)
+        return self._parse_and_cache_spec(cache_prompt, response)
+
+    async def aextract_specifications(self, user_message: str, context: Dict = None, conversation_history: List[str] = None, previous_ai_response: str = None) -> AIResponse:
+        """Async spec extraction - aynı prompt, paralel çağrılar için"""
+        cache_prompt = self._spec_cache_prompt(user_message, context, conversation_history, previous_ai_response)
+        cached = self.cache.get('spec', cache_prompt)
+        if cached is not None:
+            return self._parse_spec_response(cached)
+
+        messages = self._build_spec_messages(user_message, context, conversation_history, previous_ai_response)
+        response = await self._amake_request(messages, temperature=0.2)
+        return self._parse_and_cache_spec(cache_prompt, response)
+
+    def _parse_and_cache_spec(self, cache_prompt: str, response: str) -> AIResponse:
+        """Cevabı doğrula, ancak geçerli JSON ise cache'le.
+
+        Bozuk bir cevap cache'e girerse fallback 24 saat boyunca (fuzzy
+        tier üzerinden benzer promptlara da) tekrar oynatılır; cache dışı
+        bırakılırsa bir sonraki turn'de yeniden denenir."""
+        try:
+            data = json.loads(response)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse AI response as JSON: {e}")
+            return self._fallback_spec_response()
+
+        self.cache.put('spec', cache_prompt, response)
+        return self._spec_from_data(data)
+
+    def _build_intent_messages(self, user_message: str, conversation_history: List[str] = None) -> List[Dict[str, str]]:
+        """Build message list for intent classification (shared by sync/async paths)"""
+
         system_prompt = """Kullanıcının niyetini sınıflandır. Sadece kategori ismi döndür:
 
 Kategoriler:
@@ -289,14 +669,50 @@ Sadece kategori ismini döndür, açıklama yapma."""
         if conversation_history:
             history_context = "\n".join(conversation_history[-3:])  # Son 3 mesaj
             messages.insert(1, {"role": "assistant", "content": f"Geçmiş konuşma: {history_context}"})
-        
+
+        return messages
+
+    def classify_intent(self, user_message: str, conversation_history: List[str] = None) -> str:
+        """Classify user intent for conversation flow"""
+        # Cache only stateless calls - history changes the expected answer
+        cacheable = not conversation_history
+        if cacheable:
+            cached = self.cache.get('intent', user_message)
+            if cached is not None:
+                return cached
+
+        messages = self._build_intent_messages(user_message, conversation_history)
+
         try:
             response = self._make_request(messages, temperature=0.1)
-            return response.strip().lower()
+            intent = response.strip().lower()
+            if cacheable:
+                self.cache.put('intent', user_message, intent)
+            return intent
         except Exception as e:
             logger.error(f"Intent classification failed: {e}")
             return "general_question"
-    
+
+    async def aclassify_intent(self, user_message: str, conversation_history: List[str] = None) -> str:
+        """Async intent classification - paralel çağrılar için"""
+        cacheable = not conversation_history
+        if cacheable:
+            cached = self.cache.get('intent', user_message)
+            if cached is not None:
+                return cached
+
+        messages = self._build_intent_messages(user_message, conversation_history)
+
+        try:
+            response = await self._amake_request(messages, temperature=0.1)
+            intent = response.strip().lower()
+            if cacheable:
+                self.cache.put('intent', user_message, intent)
+            return intent
+        except Exception as e:
+            logger.error(f"Intent classification failed: {e}")
+            return "general_question"
+
     def extract_quantity(self, quantity_text: str, context: Dict = None) -> Dict:
         """Doğal dil ile miktar çıkarımı"""
         
@@ -330,26 +746,125 @@ Eğer sayı bulamazsan:
         
         try:
             response = self._make_request(messages, temperature=0.1)
-            
+
             # JSON parse et
-            import json
             result = json.loads(response.strip())
             return result
-            
+
         except Exception as e:
             logger.error(f"Quantity extraction failed: {e}")
             # Fallback: basit regex
-            import re
-            numbers = re.findall(r'\d+', quantity_text)
+            numbers = _DIGITS_RE.findall(quantity_text)
             if numbers:
                 return {"extracted_quantity": int(numbers[0])}
             else:
                 return {"extracted_quantity": None}
     
-    def generate_response(self, user_message: str, context: Dict, products: List[Dict] = None) -> str:
-        """Generate natural conversational response"""
-        
-        system_prompt = """Sen profesyonel bir B2B satış danışmanısın. 
+    def _build_batch_intent_messages(self, user_messages: List[str]) -> List[Dict[str, str]]:
+        """Build one prompt classifying several messages at once"""
+
+        system_prompt = """Kullanıcı mesajlarının niyetini sınıflandır.
+
+Kategoriler:
+- product_search: Ürün arıyor
+- spec_question: Teknik özellik soruyor
+- price_inquiry: Fiyat soruyor
+- order_intent: Sipariş vermek istiyor
+- company_info: Firma bilgisi veriyor
+- general_question: Genel soru
+- greeting: Selamlama
+- complaint: Şikayet
+
+Her mesaj için bir kategori seç. SADECE JSON listesi döndür, açıklama yapma.
+Örnek: ["greeting", "product_search"]"""
+
+        numbered = "\n".join(f"{i}. {msg}" for i, msg in enumerate(user_messages, 1))
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Mesajlar:\n{numbered}"}
+        ]
+
+    def _parse_batch_intents(self, response: str, count: int) -> List[str]:
+        """Parse the JSON intent list; pad with fallback on mismatch"""
+        try:
+            intents = json.loads(response.strip())
+            if not isinstance(intents, list):
+                raise ValueError("expected JSON list")
+            intents = [str(i).strip().lower() for i in intents]
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Failed to parse batch intent response: {e}")
+            intents = []
+
+        # Her mesaja bir intent düşsün
+        intents = intents[:count]
+        intents += ["general_question"] * (count - len(intents))
+        return intents
+
+    def classify_intents_batch(self, user_messages: List[str]) -> List[str]:
+        """Classify several messages with a single API round trip"""
+        messages = self._build_batch_intent_messages(user_messages)
+
+        try:
+            response = self._make_request(messages, temperature=0.1)
+            return self._parse_batch_intents(response, len(user_messages))
+        except Exception as e:
+            logger.error(f"Batch intent classification failed: {e}")
+            return ["general_question"] * len(user_messages)
+
+    async def aclassify_intents_batch(self, user_messages: List[str]) -> List[str]:
+        """Async batch intent classification - tek istek, N mesaj"""
+        messages = self._build_batch_intent_messages(user_messages)
+
+        try:
+            response = await self._amake_request(messages, temperature=0.1)
+            return self._parse_batch_intents(response, len(user_messages))
+        except Exception as e:
+            logger.error(f"Batch intent classification failed: {e}")
+            return ["general_question"] * len(user_messages)
+
+    # Batch eki sabit tutulur - SPEC_SYSTEM_PROMPT + ek de byte-identical kalır
+    SPEC_BATCH_SUFFIX = "\n\nBIRDEN FAZLA MESAJ: Aşağıdaki numaralı mesajların HER BİRİ için yukarıdaki şemada bir JSON objesi üret ve bunları sırayla bir JSON listesinde döndür. Sadece listeyi döndür."
+
+    def _build_batch_spec_messages(self, user_messages: List[str]) -> List[Dict[str, str]]:
+        """Build one spec-extraction prompt covering several messages"""
+        numbered = "\n".join(f"{i}. {msg}" for i, msg in enumerate(user_messages, 1))
+        return [
+            self._cached_system_message(self.SPEC_SYSTEM_PROMPT + self.SPEC_BATCH_SUFFIX),
+            {"role": "user", "content": f"Mesajlar:\n{numbered}"}
+        ]
+
+    def _parse_batch_specs(self, response: str, count: int) -> List[AIResponse]:
+        """Parse the JSON array of spec objects; pad with fallbacks on mismatch"""
+        try:
+            items = json.loads(response)
+            if not isinstance(items, list):
+                raise ValueError("expected JSON list")
+            parsed = [self._spec_from_data(item) if isinstance(item, dict) else self._fallback_spec_response()
+                      for item in items]
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Failed to parse batch spec response: {e}")
+            parsed = []
+
+        parsed = parsed[:count]
+        parsed += [self._fallback_spec_response() for _ in range(count - len(parsed))]
+        return parsed
+
+    def extract_specifications_batch(self, user_messages: List[str]) -> List[AIResponse]:
+        """Extract specs for several messages with a single API round trip"""
+        messages = self._build_batch_spec_messages(user_messages)
+        response = self._make_request(messages, temperature=0.2)
+        return self._parse_batch_specs(response, len(user_messages))
+
+    async def aextract_specifications_batch(self, user_messages: List[str]) -> List[AIResponse]:
+        """Async batch spec extraction - tek istek, N mesaj"""
+        messages = self._build_batch_spec_messages(user_messages)
+        response = await self._amake_request(messages, temperature=0.2)
+        return self._parse_batch_specs(response, len(user_messages))
+
+    def _build_response_messages(self, user_message: str, context: Dict, products: List[Dict] = None) -> List[Dict[str, str]]:
+        """Build message list for response generation (shared by sync/async paths)"""
+
+        system_prompt = """Sen profesyonel bir B2B satış danışmanısın.
         
 Görevlerin:
 1. Müşteri ihtiyaçlarını anla
@@ -372,16 +887,157 @@ Bulunan ürünler: {products_str}
 
 Uygun bir yanıt oluştur."""}
         ]
-        
+
+        return messages
+
+    def generate_response(self, user_message: str, context: Dict, products: List[Dict] = None) -> str:
+        """Generate natural conversational response"""
+        messages = self._build_response_messages(user_message, context, products)
+
         try:
             return self._make_request(messages, temperature=0.7)
         except Exception as e:
             logger.error(f"Response generation failed: {e}")
             return "Üzgünüm, şu anda teknik bir sorun yaşıyoruz. Lütfen daha sonra tekrar deneyin."
 
+    async def agenerate_response(self, user_message: str, context: Dict, products: List[Dict] = None) -> str:
+        """Async response generation - paralel çağrılar için"""
+        messages = self._build_response_messages(user_message, context, products)
+
+        try:
+            return await self._amake_request(messages, temperature=0.7)
+        except Exception as e:
+            logger.error(f"Response generation failed: {e}")
+            return "Üzgünüm, şu anda teknik bir sorun yaşıyoruz. Lütfen daha sonra tekrar deneyin."
+
+    def _build_classify_respond_messages(self, user_message: str, conversation_history: List[str] = None,
+                                         context: Dict = None, products: List[Dict] = None) -> List[Dict[str, str]]:
+        """Build one prompt returning intent + response together"""
+
+        system_prompt = """Sen profesyonel bir B2B satış danışmanısın. İki işi TEK seferde yap:
+
+1. Mesajın niyetini sınıflandır:
+- product_search: Ürün arıyor
+- spec_question: Teknik özellik soruyor
+- price_inquiry: Fiyat soruyor
+- order_intent: Sipariş vermek istiyor
+- company_info: Firma bilgisi veriyor
+- general_question: Genel soru
+- greeting: Selamlama
+- complaint: Şikayet
+
+2. Niyet product_search veya spec_question DEĞİLSE kısa, doğal bir Türkçe yanıt yaz.
+Ürün/teknik aramalarında yanıtı sistem kuracak, response alanını null bırak.
+
+SADECE JSON döndür, açıklama yapma:
+{"intent": "kategori", "response": "yanıt veya null"}"""
+
+        context_str = json.dumps(context, ensure_ascii=False) if context else "Yok"
+        products_str = json.dumps(products, ensure_ascii=False) if products else "Yok"
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"""
+Müşteri mesajı: {user_message}
+Konversation context: {context_str}
+Bulunan ürünler: {products_str}"""}
+        ]
+
+        if conversation_history:
+            history_context = "\n".join(conversation_history[-3:])  # Son 3 mesaj
+            messages.insert(1, {"role": "assistant", "content": f"Geçmiş konuşma: {history_context}"})
+
+        return messages
+
+    def classify_and_respond(self, user_message: str, conversation_history: List[str] = None,
+                             context: Dict = None, products: List[Dict] = None) -> tuple:
+        """Tek istekte intent sınıflandırması + (gerekirse) doğal yanıt.
+
+        main() loop'u eskiden classify_intent ve ardından generate_response
+        olarak iki bağımlı RTT ödüyordu; tek prompt ikisini birden JSON
+        olarak döndürür. (intent, response|None) döner.
+        """
+        messages = self._build_classify_respond_messages(user_message, conversation_history, context, products)
+
+        try:
+            response = self._make_request(messages, temperature=0.3)
+            data = json.loads(response.strip())
+            intent = str(data.get("intent", "general_question")).strip().lower()
+            return intent, data.get("response") or None
+        except Exception as e:
+            logger.error(f"Classify-and-respond failed: {e}")
+            return "general_question", None
+
+class SpecExtractionBatcher:
+    """Eşzamanlı spec-extraction çağrılarını tek LLM isteğinde toplar.
+
+    Kuyruk max_batch mesaja ulaşınca ya da ilk mesajdan itibaren max_wait
+    geçince flush edilir; tek istek aextract_specifications_batch ile gider
+    ve her çağıran kendi AIResponse'unu future üzerinden alır. İstek başına
+    network/prompt maliyeti N mesaja bölünür, bedeli en fazla max_wait
+    gecikmedir. SPEC_BATCHING=1 ile açılır; kapalıyken tekil çağrıya düşer.
+    """
+
+    def __init__(self, client: "OpenRouterClient", max_batch: int = 8, max_wait: float = 0.15, enabled: bool = None):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.enabled = (os.getenv("SPEC_BATCHING", "0") == "1") if enabled is None else enabled
+        self._queue: List[tuple] = []  # (user_message, future)
+        self._flush_task = None
+        self._lock = asyncio.Lock()
+
+    async def extract(self, user_message: str) -> AIResponse:
+        if not self.enabled:
+            return await self.client.aextract_specifications(user_message)
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        async with self._lock:
+            self._queue.append((user_message, fut))
+            if len(self._queue) >= self.max_batch:
+                # Kuyruk doldu - bekleme süresini beklemeden hemen flush
+                if self._flush_task is not None:
+                    self._flush_task.cancel()
+                    self._flush_task = None
+                asyncio.ensure_future(self._flush())
+            elif self._flush_task is None:
+                self._flush_task = asyncio.ensure_future(self._delayed_flush())
+        return await fut
+
+    async def _delayed_flush(self):
+        try:
+            await asyncio.sleep(self.max_wait)
+        except asyncio.CancelledError:
+            return
+        await self._flush()
+
+    async def _flush(self):
+        async with self._lock:
+            batch, self._queue = self._queue, []
+            self._flush_task = None
+        if not batch:
+            return
+
+        try:
+            results = await self.client.aextract_specifications_batch([m for m, _ in batch])
+        except Exception as e:
+            logger.error(f"Batched spec extraction failed: {e}")
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
 # Global instance
 openrouter_client = OpenRouterClient()
 
+# Eşzamanlı oturumlar için paylaşılan batcher (SPEC_BATCHING=1 ile aktif)
+spec_batcher = SpecExtractionBatcher(openrouter_client)
+
 # Test function
 def test_client():
     """Test OpenRouter client functionality"""
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Numba JIT parser - toplu log işleme için çap/strok çıkarımı
+
+cli_test'teki regex yolu REPL için yeterli; bu modül binlerce geçmiş
+mesajın offline backfill'i için aynı çıkarımı @njit derlenmiş bir byte
+taramasıyla yapar. İlk çağrıda derlenir (cache=True ile diske yazılır),
+sonrası saf makine kodu.
+"""
+
+import numpy as np
+from numba import njit
+
+# Türkçe karakterler tek byte'a indirgenir ki njit tarafı saf ASCII tarasın:
+# Ç → C, Ø → '#' işareti (digit-öncesi çap göstergesi)
+_TRANS = str.maketrans({'Ç': 'C', 'Ø': '#'})
+
+
+def _encode(message: str) -> np.ndarray:
+    """Mesajı njit'in tarayacağı uint8 buffer'a çevir"""
+    data = message.upper().translate(_TRANS).encode('ascii', 'replace')
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+@njit(cache=True)
+def parse_dims(buf):
+    """Byte buffer'dan (diameter, stroke) çıkar; bulunamayan değer -1.
+
+    cli_test regex'lerinin DFA karşılığı:
+      sayı + CAP/CAPLI/LUK  → çap
+      sayı + STROK/STROKLU  → strok
+      '#' (Ø) + sayı        → çap
+    """
+    diameter = -1
+    stroke = -1
+    n = buf.size
+    i = 0
+
+    while i < n:
+        c = buf[i]
+
+        if c == 35:  # '#' == Ø - ardından gelen sayı çaptır
+            i += 1
+            val = 0
+            found = False
+            while i < n and 48 <= buf[i] <= 57:
+                val = val * 10 + (buf[i] - 48)
+                found = True
+                i += 1
+            if found and diameter < 0:
+                diameter = val
+            continue
+
+        if 48 <= c <= 57:
+            val = 0
+            while i < n and 48 <= buf[i] <= 57:
+                val = val * 10 + (buf[i] - 48)
+                i += 1
+
+            # Sayıdan sonraki boşlukları atla, anahtar kelimeye bak
+            j = i
+            while j < n and buf[j] == 32:
+                j += 1
+
+            if j + 2 < n and buf[j] == 67 and buf[j + 1] == 65 and buf[j + 2] == 80:
+                # CAP / CAPLI
+                if diameter < 0:
+                    diameter = val
+            elif j + 4 < n and buf[j] == 83 and buf[j + 1] == 84 and buf[j + 2] == 82 \
+                    and buf[j + 3] == 79 and buf[j + 4] == 75:
+                # STROK / STROKLU
+                if stroke < 0:
+                    stroke = val
+            elif j + 2 < n and buf[j] == 76 and buf[j + 1] == 85 and buf[j + 2] == 75:
+                # LUK ("100'lük")
+                if diameter < 0:
+                    diameter = val
+            continue
+
+        i += 1
+
+    return diameter, stroke
+
+
+@njit(cache=True)
+def contains_any(hay, kw_buf, kw_offsets):
+    """hay içinde kw_offsets ile dilimlenmiş anahtar kelimelerden biri var mı.
+
+    kw_buf tüm anahtar kelimelerin ardışık utf-8 byte'ları, kw_offsets[k] ile
+    kw_offsets[k+1] arası k'ıncı kelime. Python substring döngüsünün makine
+    kodu karşılığı - geniş aday listelerinde skor hesabı için.
+    """
+    n = hay.size
+    for k in range(kw_offsets.size - 1):
+        start = kw_offsets[k]
+        m = kw_offsets[k + 1] - start
+        if m == 0 or m > n:
+            continue
+        for i in range(n - m + 1):
+            ok = True
+            for j in range(m):
+                if hay[i + j] != kw_buf[start + j]:
+                    ok = False
+                    break
+            if ok:
+                return True
+    return False
+
+
+def encode_keywords(keywords):
+    """Kelime listesini (kw_buf, kw_offsets) çiftine çevir (init'te bir kez)"""
+    bufs = [kw.encode('utf-8') for kw in keywords]
+    offsets = np.zeros(len(bufs) + 1, dtype=np.int64)
+    for i, b in enumerate(bufs):
+        offsets[i + 1] = offsets[i] + len(b)
+    return np.frombuffer(b''.join(bufs), dtype=np.uint8), offsets
+
+
+def batch_parse(messages):
+    """Mesaj listesinden [(diameter|None, stroke|None), ...] çıkar"""
+    results = []
+    for message in messages:
+        diameter, stroke = parse_dims(_encode(message))
+        results.append((diameter if diameter >= 0 else None,
+                        stroke if stroke >= 0 else None))
+    return results
+
+
+if __name__ == "__main__":
+    samples = [
+        "100 çap silindir var mı",
+        "Ø63 amortisörlü silindir",
+        "400 stroklu silindir lazım",
+        "100 çaplı 200 stroklu silindir",
+    ]
+    for msg, dims in zip(samples, batch_parse(samples)):
+        print(f"{msg!r} -> çap={dims[0]}, strok={dims[1]}")
@@ -78,9 +78,11 @@ class DocumentGenerator:
         metadata = {
             "product_id": product_row['id'],
             "malzeme_kodu": str(product_row['malzeme_kodu']),
+            "malzeme_adi": str(name),  # Sorgu tarafı doküman parse etmeden isme ulaşır
             "brand": str(brand),
             "category": str(category),
             "stock": float(stock),
+            "in_stock": stock > 0,  # Bool filtre - numeric karşılaştırmadan hızlı
             "searchable_text": str(name.upper()),
             # Flatten features for ChromaDB
             "diameter": features.get('diameter', 0),
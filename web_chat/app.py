@@ -15,7 +15,7 @@ from datetime import datetime
 # Add parent directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from conversation_system import B2BConversationSystem
+from conversation_system import B2BConversationSystem, OrderDraft
 from openrouter_client import openrouter_client
 
 app = Flask(__name__)
@@ -344,7 +344,7 @@ def select_product():
         }
         
         system.context.selected_products = [selected_product]
-        system.context.current_order = (selected_product, None)
+        system.context.current_order = OrderDraft.from_product(selected_product)
         system.context.conversation_stage = 'order_creation'
         
         # Set AI response for when user returns to chat
@@ -389,7 +389,7 @@ def check_selection():
             context_info = {
                 'diameter': system.context.extracted_specs.get('diameter'),
                 'stroke': system.context.extracted_specs.get('stroke'),
-                'selected_product': system.context.current_order[0]['name'] if system.context.current_order else None
+                'selected_product': system.context.current_order.name if system.context.current_order else None
             }
             
             return jsonify({
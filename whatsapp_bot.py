@@ -12,7 +12,7 @@ from twilio.twiml.messaging_response import MessagingResponse
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(__file__))
-from conversation_system import B2BConversationSystem
+from conversation_system import B2BConversationSystem, OrderDraft
 
 app = Flask(__name__)
 
@@ -145,7 +145,7 @@ def whatsapp_product_select(phone_number, product_id):
             return "Ürün bulunamadı!"
         
         # Store selection in context
-        system.context.current_order = (selected_product, None)
+        system.context.current_order = OrderDraft.from_product(selected_product)
         system.context.conversation_stage = 'order_creation'
         
         # Send WhatsApp message
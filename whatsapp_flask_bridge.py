@@ -11,7 +11,7 @@ from flask import Flask, request, jsonify, render_template
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(__file__))
-from conversation_system import B2BConversationSystem
+from conversation_system import B2BConversationSystem, OrderDraft
 
 app = Flask(__name__, template_folder='web_chat/templates')
 
@@ -229,7 +229,7 @@ def whatsapp_product_select(phone_number, product_id):
 📝 Bu ürün şu an stokta bulunmamaktadır. Tedarik süresi ve fiyat bilgisi için müşteri temsilcimizle iletişime geçebilirsiniz."""
         else:
             # Product has stock - proceed with order creation
-            system.context.current_order = (selected_product, None)
+            system.context.current_order = OrderDraft.from_product(selected_product)
             system.context.conversation_stage = 'order_creation'
             message = f"""✅ ÜRÜN SEÇİLDİ
         
@@ -12,7 +12,7 @@ import requests
 import json
 
 sys.path.append('.')
-from conversation_system import B2BConversationSystem
+from conversation_system import B2BConversationSystem, OrderDraft
 
 app = Flask(__name__)
 
@@ -117,7 +117,7 @@ def whatsapp_product_select(phone_number, product_id):
             return "Ürün bulunamadı!"
         
         # Store selection
-        system.context.current_order = (selected_product, None)
+        system.context.current_order = OrderDraft.from_product(selected_product)
         system.context.conversation_stage = 'order_creation'
         
         # Send WhatsApp message